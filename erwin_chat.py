@@ -1,30 +1,55 @@
 """
 Simple Conversational Interface for erwin Data Model
 """
+import functools
+import os
+import re
+
 import chromadb
-from sentence_transformers import SentenceTransformer
+
+from erwin_embeddings import (
+    cached_encoder,
+    collection_space,
+    configure_cpu_threads,
+    distance_to_score,
+    load_query_model
+)
 
 class ErwinChatbot:
+    # Question keywords that select the response section
+    # (plural forms included since questions are matched word by word)
+    _ATTR_WORDS = frozenset({'attribute', 'attributes', 'field', 'fields'})
+    _RULE_WORDS = frozenset({'rule', 'rules', 'validation', 'validations'})
+    _DESC_WORDS = frozenset({'description'})
+    _WORD_RE = re.compile(r"[a-z]+")
+    
     def __init__(self):
         print("🤖 Initializing erwin Data Model Assistant...")
         
+        # Size the CPU thread pools before the first forward pass
+        configure_cpu_threads(max(1, (os.cpu_count() or 2) // 2), 2)
+        
         # Set up ChromaDB
         self.client = chromadb.PersistentClient(path="./improved_chroma_db")
         self.collection = self.client.get_collection("erwin-entities")
+        self._distance_to_score = functools.partial(distance_to_score, collection_space(self.collection))
         
         # Set up embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = load_query_model()
+        
+        # Cache query embeddings so repeated questions skip the model
+        self._encode_cached = cached_encoder(self.embedding_model, maxsize=512)
         
         print("✅ Assistant ready! Ask me about your data model.")
     
     def search_entities(self, question, top_k=2):
         """Search for relevant entities based on question"""
-        # Create query embedding
-        query_embedding = self.embedding_model.encode(question)
+        # Create query embedding (cached per normalized question)
+        query_embedding = self._encode_cached(question.strip().lower())
         
         # Search ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
+            query_embeddings=query_embedding.reshape(1, -1),
             n_results=top_k,
             include=["metadatas", "documents", "distances"]
         )
@@ -44,24 +69,26 @@ class ErwinChatbot:
         
         # Get the best match
         best_match = results['metadatas'][0][0]
-        best_score = 1 - results['distances'][0][0]
+        best_score = self._distance_to_score(results['distances'][0][0])
         best_content = results['documents'][0][0]
         
         # Generate response based on question type
         entity_name = best_match['entity_name']
         subject_area = best_match['subject_area']
         
-        if best_score < -0.5:
+        if best_score < 0.25:
             return f"❓ I found '{entity_name}' but it doesn't seem very relevant to your question. Could you rephrase?"
         
         # Create a natural response
         response = f"📊 Based on your question, I found the **{entity_name}** entity in the {subject_area} area.\n\n"
         
-        if "attribute" in question.lower() or "field" in question.lower():
+        question_lower = question.lower()
+        question_words = set(self._WORD_RE.findall(question_lower))
+        if question_words & self._ATTR_WORDS:
             response += self._extract_attributes(best_content)
-        elif "rule" in question.lower() or "validation" in question.lower():
+        elif question_words & self._RULE_WORDS:
             response += self._extract_business_rules(best_content)
-        elif "description" in question.lower() or "what is" in question.lower():
+        elif question_words & self._DESC_WORDS or "what is" in question_lower:
             response += self._extract_description(best_content)
         else:
             # General overview
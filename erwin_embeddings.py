@@ -0,0 +1,79 @@
+"""
+Query embedding helpers shared by the erwin chat assistants
+
+Model loading, thread sizing, cached question encoding and the conversion
+from Chroma distances to cosine similarity live here so the terminal
+chatbots and the web app stay in step.
+"""
+import functools
+
+import torch
+from sentence_transformers import SentenceTransformer
+
+# The assistants only run inference, so autograd bookkeeping is never needed
+torch.set_grad_enabled(False)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+_INT8_ONNX_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
+
+def configure_cpu_threads(intra_op, interop):
+    """Size torch's CPU thread pools before the first forward pass"""
+    if torch.cuda.is_available():
+        return
+    torch.set_num_threads(intra_op)
+    try:
+        torch.set_num_interop_threads(interop)
+    except RuntimeError:
+        pass  # Already fixed once any parallel work has run
+
+def load_query_model(onnx_threads=None):
+    """Load MiniLM at the cheapest precision the hardware supports"""
+    if torch.cuda.is_available():
+        return SentenceTransformer(MODEL_NAME, device='cuda').half().eval()
+    
+    # On CPU prefer the INT8 (AVX512-VNNI) ONNX export, falling back to PyTorch
+    # when the ONNX backend or the quantized file is unavailable
+    try:
+        model_kwargs = {'file_name': _INT8_ONNX_FILE}
+        if onnx_threads is not None:
+            import onnxruntime as ort
+            
+            session_options = ort.SessionOptions()
+            session_options.intra_op_num_threads = onnx_threads
+            session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            model_kwargs['provider'] = 'CPUExecutionProvider'
+            model_kwargs['session_options'] = session_options
+        return SentenceTransformer(MODEL_NAME, backend='onnx', model_kwargs=model_kwargs).eval()
+    except Exception as e:
+        print(f"⚠️  ONNX INT8 model unavailable ({e}), using PyTorch backend")
+        return SentenceTransformer(MODEL_NAME).eval()
+
+def encode_query(model, question):
+    """Encode a normalized question into a read-only float32 unit vector"""
+    with torch.inference_mode():
+        embedding = model.encode(question, normalize_embeddings=True)
+    # Shared through the LRU cache, so keep it read-only
+    embedding.setflags(write=False)
+    return embedding
+
+def cached_encoder(model, maxsize):
+    """encode_query for one model behind an LRU keyed on the normalized question"""
+    # MiniLM is uncased, so callers lowercasing the key doesn't change the vector
+    return functools.lru_cache(maxsize=maxsize)(functools.partial(encode_query, model))
+
+def collection_space(collection):
+    """The collection's HNSW distance ('l2' for collections created without one)"""
+    return (collection.metadata or {}).get('hnsw:space', 'l2')
+
+def distance_to_score(space, distance):
+    """Convert a Chroma distance between unit vectors into cosine similarity"""
+    if space == 'l2':
+        # Squared L2 between unit vectors is 2 - 2·cos
+        return 1.0 - 0.5 * distance
+    return 1.0 - distance
+
+def score_to_distance(space, score):
+    """Inverse of distance_to_score, for results produced outside Chroma"""
+    if space == 'l2':
+        return 2.0 - 2.0 * score
+    return 1.0 - score
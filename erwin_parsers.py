@@ -0,0 +1,105 @@
+"""
+Document parsing helpers for the erwin chat assistants
+
+Fully annotated so the module can be compiled ahead of time with mypyc
+(`mypyc erwin_parsers.py`); the chatbots import the compiled extension
+when it is present and this source otherwise.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# Document line classifiers: section headers ("Attributes (27 total):") and bullets
+_SECTION_RE = re.compile(r'^\s*(Attributes|Business Rules|Description|Entities in this Subject Area|Relationship)\s*(?:\([^)]*\))?\s*:(.*)$')
+_BULLET_RE = re.compile(r'^\s*•\s*(.+)$')
+
+# Section headers mapped to their key in parse_sections
+# ("Relationship" only closes the preceding section)
+_SECTION_KEYS: Dict[str, Optional[str]] = {
+    "Description": "description",
+    "Attributes": "attributes",
+    "Business Rules": "business_rules",
+    "Entities in this Subject Area": "entities",
+    "Relationship": None
+}
+
+def parse_sections(content: str) -> Dict[str, List[str]]:
+    """Parse document content into its section lines in a single pass"""
+    sections: Dict[str, List[str]] = {"description": [], "attributes": [], "business_rules": [], "entities": []}
+    current: Optional[str] = None
+    
+    for line in content.split('\n'):
+        header = _SECTION_RE.match(line)
+        if header:
+            current = _SECTION_KEYS[header.group(1)]
+            inline = header.group(2).strip()
+            if current == "description" and inline:
+                sections["description"].append(inline)
+            continue
+        
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            if current is not None and current != "description":
+                sections[current].append(bullet.group(1).strip())
+            continue
+        
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if current == "description":
+            sections["description"].append(stripped)
+        else:
+            # Any other line closes a bullet section
+            current = None
+    
+    return sections
+
+def extract_attributes(sections: Dict[str, List[str]]) -> str:
+    """Extract attributes from parsed sections"""
+    attributes = sections['attributes']
+    if attributes:
+        return "🏗️ **Key Attributes:**\n" + "\n".join([f"• {attr}" for attr in attributes[:8]])
+    return "No attributes found."
+
+def extract_key_attributes(sections: Dict[str, List[str]], limit: int = 5) -> str:
+    """Extract limited number of key attributes"""
+    attributes = sections['attributes'][:limit]
+    if attributes:
+        return "🏗️ **Key Attributes:**\n" + "\n".join([f"• {attr}" for attr in attributes])
+    return ""
+
+def extract_business_rules(sections: Dict[str, List[str]]) -> str:
+    """Extract business rules from parsed sections"""
+    rules = sections['business_rules']
+    if rules:
+        return "📋 **Business Rules:**\n" + "\n".join([f"• {rule}" for rule in rules[:6]])
+    return "No business rules found."
+
+def extract_description(sections: Dict[str, List[str]]) -> str:
+    """Extract description from parsed sections"""
+    if sections['description']:
+        return "📝 **Description:**\n" + " ".join(sections['description'])
+    return "📝 **Description:** No description available."
+
+def find_related_matches(other_matches: List[Dict[str, Any]], entity_name: str, limit: int = 3) -> str:
+    """Find related information in other matches"""
+    related_info: List[str] = []
+    append = related_info.append
+    
+    for match in other_matches:
+        score = match['score']
+        # Only include reasonably close matches (None: found by exact metadata lookup)
+        if score is not None and score <= 0.5:
+            continue
+        metadata = match['metadata']
+        match_type = metadata['type']
+        if match_type == 'relationship':
+            if metadata.get('parent_entity') == entity_name or metadata.get('child_entity') == entity_name:
+                append(f"• {metadata['relationship_name']} ({metadata['relationship_type']})")
+        elif match_type == 'entity':
+            append(f"• {metadata['entity_name']} entity ({metadata['subject_area']})")
+        else:
+            continue
+        if len(related_info) >= limit:
+            break
+    
+    return "\n".join(related_info)
\ No newline at end of file
@@ -1,496 +1,625 @@
 """
 Load realistic enterprise erwin data model
 """
-import chromadb
-from sentence_transformers import SentenceTransformer
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from hashlib import blake2b, sha256
+from typing import Tuple
 
+import numpy as np
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The enterprise model ships as JSON next to this module; compress_data() can
+# add a zstd copy that loads in preference while it is newer than the JSON
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "realistic_erwin.json")
+COMPRESSED_DATA_PATH = DATA_PATH + ".zst"
+
+@functools.lru_cache(maxsize=1)
 def get_realistic_erwin_data():
-    """Complete enterprise e-commerce data model"""
-    return {
-        "model_info": {
-            "name": "Enterprise E-Commerce Data Model",
-            "version": "2.1",
-            "description": "Complete data model for multi-channel e-commerce platform",
-            "created_date": "2024-01-15",
-            "last_modified": "2024-09-15"
-        },
-        "entities": [
-            # Customer Management Subject Area
-            {
-                "name": "Customer",
-                "business_name": "Customer",
-                "description": """
-                Central entity storing comprehensive customer information for the e-commerce platform.
-                Supports both B2C and B2B customers with detailed profile management, preferences,
-                and relationship tracking. Integrates with CRM, marketing automation, and support systems.
-                """,
-                "subject_area": "Customer Management",
-                "attributes": [
-                    "customer_id: Primary key, auto-generated unique identifier (INTEGER)",
-                    "customer_type: B2C or B2B customer classification (VARCHAR(10))",
-                    "email: Unique email address for login and communication (VARCHAR(255))",
-                    "password_hash: Encrypted password for account security (VARCHAR(255))",
-                    "first_name: Customer's given name (VARCHAR(100))",
-                    "last_name: Customer's family name (VARCHAR(100))",
-                    "company_name: Business name for B2B customers (VARCHAR(255))",
-                    "phone_primary: Primary contact phone number (VARCHAR(20))",
-                    "phone_secondary: Alternative contact number (VARCHAR(20))",
-                    "date_of_birth: Customer birth date for age verification (DATE)",
-                    "gender: Customer gender for demographics (VARCHAR(10))",
-                    "date_registered: Account creation timestamp (TIMESTAMP)",
-                    "date_last_login: Most recent login activity (TIMESTAMP)",
-                    "email_verified: Email verification status (BOOLEAN)",
-                    "phone_verified: Phone verification status (BOOLEAN)",
-                    "marketing_opt_in: Permission for marketing communications (BOOLEAN)",
-                    "loyalty_tier: Bronze, Silver, Gold, Platinum based on spend (VARCHAR(20))",
-                    "loyalty_points: Current loyalty program points balance (INTEGER)",
-                    "credit_limit: Maximum credit allowed for B2B customers (DECIMAL(10,2))",
-                    "tax_exempt: Tax exemption status for organizations (BOOLEAN)",
-                    "preferred_language: Customer's preferred language (VARCHAR(10))",
-                    "timezone: Customer's timezone for scheduling (VARCHAR(50))",
-                    "is_active: Account status indicator (BOOLEAN)",
-                    "created_by: User who created the record (VARCHAR(100))",
-                    "created_date: Record creation timestamp (TIMESTAMP)",
-                    "modified_by: User who last modified the record (VARCHAR(100))",
-                    "modified_date: Last modification timestamp (TIMESTAMP)"
-                ],
-                "business_rules": [
-                    "Email addresses must be unique across all customer types",
-                    "Phone numbers must follow E.164 international format",
-                    "Passwords must meet complexity requirements (8+ chars, mixed case, numbers, symbols)",
-                    "Date of birth required for age-restricted product purchases",
-                    "Loyalty tier automatically calculated based on 12-month rolling purchase total",
-                    "B2B customers require company name and tax ID",
-                    "Marketing opt-in must be explicitly granted, not defaulted",
-                    "Inactive customers cannot place orders or access premium features",
-                    "Customer data retention follows GDPR requirements (7 years for tax, 3 years for marketing)",
-                    "Credit limit requires manager approval for amounts over $10,000"
-                ]
-            },
-            {
-                "name": "CustomerAddress",
-                "business_name": "Customer Address",
-                "description": """
-                Stores multiple addresses per customer including billing, shipping, and business addresses.
-                Supports international address formats and address validation services.
-                Tracks address usage history and preferences.
-                """,
-                "subject_area": "Customer Management",
-                "attributes": [
-                    "address_id: Primary key, unique address identifier (INTEGER)",
-                    "customer_id: Foreign key to Customer entity (INTEGER)",
-                    "address_type: Billing, Shipping, Business, Other (VARCHAR(20))",
-                    "address_label: Customer-defined name for address (VARCHAR(100))",
-                    "recipient_name: Name of person receiving at this address (VARCHAR(200))",
-                    "company_name: Company name for business addresses (VARCHAR(255))",
-                    "address_line1: Primary address line (VARCHAR(255))",
-                    "address_line2: Secondary address line, apartment, suite (VARCHAR(255))",
-                    "city: City or locality (VARCHAR(100))",
-                    "state_province: State, province, or region (VARCHAR(100))",
-                    "postal_code: ZIP code or postal code (VARCHAR(20))",
-                    "country_code: ISO 3166-1 alpha-2 country code (VARCHAR(2))",
-                    "latitude: GPS coordinate for delivery optimization (DECIMAL(10,8))",
-                    "longitude: GPS coordinate for delivery optimization (DECIMAL(11,8))",
-                    "is_default_billing: Default billing address flag (BOOLEAN)",
-                    "is_default_shipping: Default shipping address flag (BOOLEAN)",
-                    "is_validated: Address validation status (BOOLEAN)",
-                    "validation_service: Service used for validation (VARCHAR(50))",
-                    "delivery_instructions: Special delivery notes (TEXT)",
-                    "is_active: Address availability status (BOOLEAN)"
-                ],
-                "business_rules": [
-                    "Each customer must have at least one billing address",
-                    "Only one default billing and shipping address per customer",
-                    "Address validation required for shipping addresses",
-                    "International addresses must include country code",
-                    "Postal codes must match country format requirements",
-                    "Business addresses require company name",
-                    "Delivery instructions limited to 500 characters"
-                ]
-            },
+    """Complete enterprise e-commerce data model (parsed once, shared by callers)"""
+    data = _json.loads(_read_data_bytes())
+    
+    # Phrases repeated across the model are stored once in the "$" table
+    table = data.pop("$", None)
+    if table:
+        data = _expand(data, table)
+    return _index_model(_intern_model(data))
 
-            # Product Management Subject Area
-            {
-                "name": "Product",
-                "business_name": "Product",
-                "description": """
-                Core product catalog entity containing detailed product information, pricing,
-                inventory management, and merchandising data. Supports complex product hierarchies,
-                variants, bundles, and configurable products.
-                """,
-                "subject_area": "Product Catalog",
-                "attributes": [
-                    "product_id: Primary key, unique product identifier (INTEGER)",
-                    "parent_product_id: Foreign key for product variants/children (INTEGER)",
-                    "sku: Stock keeping unit, unique across all products (VARCHAR(50))",
-                    "upc: Universal product code for retail scanning (VARCHAR(20))",
-                    "product_name: Display name for customers (VARCHAR(255))",
-                    "product_description: Detailed product description (TEXT)",
-                    "short_description: Brief product summary for listings (VARCHAR(500))",
-                    "product_type: Simple, Configurable, Bundle, Virtual, Downloadable (VARCHAR(20))",
-                    "category_id: Primary product category (INTEGER)",
-                    "brand_id: Product brand reference (INTEGER)",
-                    "vendor_id: Primary supplier reference (INTEGER)",
-                    "manufacturer_part_number: Vendor's part number (VARCHAR(100))",
-                    "weight: Product weight for shipping (DECIMAL(8,3))",
-                    "weight_unit: Weight measurement unit (VARCHAR(10))",
-                    "dimensions_length: Product length (DECIMAL(8,2))",
-                    "dimensions_width: Product width (DECIMAL(8,2))",
-                    "dimensions_height: Product height (DECIMAL(8,2))",
-                    "dimension_unit: Dimension measurement unit (VARCHAR(10))",
-                    "base_price: List price before discounts (DECIMAL(10,2))",
-                    "cost_price: Product cost for margin calculation (DECIMAL(10,2))",
-                    "msrp: Manufacturer suggested retail price (DECIMAL(10,2))",
-                    "tax_class: Tax category for calculations (VARCHAR(50))",
-                    "inventory_managed: Whether inventory is tracked (BOOLEAN)",
-                    "stock_quantity: Current inventory level (INTEGER)",
-                    "min_stock_level: Reorder point threshold (INTEGER)",
-                    "max_stock_level: Maximum inventory to maintain (INTEGER)",
-                    "backorders_allowed: Allow selling when out of stock (BOOLEAN)",
-                    "track_inventory: Enable inventory tracking (BOOLEAN)",
-                    "requires_shipping: Physical product requiring shipment (BOOLEAN)",
-                    "is_digital: Digital/downloadable product (BOOLEAN)",
-                    "download_limit: Max downloads for digital products (INTEGER)",
-                    "download_expiry: Download link expiration days (INTEGER)",
-                    "age_restriction: Minimum age required to purchase (INTEGER)",
-                    "search_keywords: SEO and search terms (TEXT)",
-                    "meta_title: Page title for SEO (VARCHAR(255))",
-                    "meta_description: Meta description for SEO (VARCHAR(500))",
-                    "is_featured: Featured product flag (BOOLEAN)",
-                    "is_active: Product availability status (BOOLEAN)",
-                    "date_available: Product availability start date (DATE)",
-                    "date_discontinued: Product end-of-life date (DATE)"
-                ],
-                "business_rules": [
-                    "SKU must be unique across all products and variants",
-                    "Base price must be greater than cost price for profitable items",
-                    "Weight required for all shippable products",
-                    "Dimensions required for oversized shipping calculations",
-                    "Digital products cannot have physical inventory",
-                    "Age-restricted products require customer age verification",
-                    "Featured products must be active and available",
-                    "Discontinued products cannot be reactivated",
-                    "Min stock level must be less than max stock level",
-                    "Backorders only allowed for non-digital products",
-                    "Download limits apply only to digital products"
-                ]
-            },
-            {
-                "name": "ProductCategory",
-                "business_name": "Product Category",
-                "description": """
-                Hierarchical product categorization system supporting multiple levels of organization.
-                Enables navigation, filtering, merchandising, and reporting by product groupings.
-                """,
-                "subject_area": "Product Catalog",
-                "attributes": [
-                    "category_id: Primary key, unique category identifier (INTEGER)",
-                    "parent_category_id: Foreign key for category hierarchy (INTEGER)",
-                    "category_name: Display name for the category (VARCHAR(255))",
-                    "category_description: Detailed category description (TEXT)",
-                    "category_path: Full hierarchical path (VARCHAR(1000))",
-                    "level: Hierarchy level (0=root, 1=main, 2=sub, etc.) (INTEGER)",
-                    "sort_order: Display order within parent category (INTEGER)",
-                    "image_url: Category image for navigation (VARCHAR(500))",
-                    "seo_url: SEO-friendly URL slug (VARCHAR(255))",
-                    "meta_title: Page title for SEO (VARCHAR(255))",
-                    "meta_description: Meta description for SEO (VARCHAR(500))",
-                    "is_active: Category visibility status (BOOLEAN)",
-                    "show_in_menu: Display in navigation menu (BOOLEAN)",
-                    "product_count: Number of products in category (INTEGER)"
-                ],
-                "business_rules": [
-                    "Root categories have no parent (parent_category_id = NULL)",
-                    "Category names must be unique within the same parent",
-                    "SEO URLs must be unique across all categories",
-                    "Categories cannot be their own parent (circular reference check)",
-                    "Inactive categories hide all child categories and products",
-                    "Category deletion requires moving or deleting all child categories",
-                    "Product count automatically updated when products added/removed"
-                ]
-            },
+def _read_data_bytes():
+    """Raw model JSON, read from the zstd frame when it is usable"""
+    if (zstandard is not None and os.path.exists(COMPRESSED_DATA_PATH)
+            and os.path.getmtime(COMPRESSED_DATA_PATH) >= os.path.getmtime(DATA_PATH)):
+        with open(COMPRESSED_DATA_PATH, "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+    with open(DATA_PATH, "rb") as f:
+        return f.read()
 
-            # Order Management Subject Area
-            {
-                "name": "Order",
-                "business_name": "Sales Order",
-                "description": """
-                Comprehensive order management entity tracking the complete purchase lifecycle
-                from cart to delivery. Supports multiple order types, payment methods, and
-                fulfillment scenarios including split shipments and backorders.
-                """,
-                "subject_area": "Order Management",
-                "attributes": [
-                    "order_id: Primary key, unique order identifier (INTEGER)",
-                    "order_number: Human-readable order reference (VARCHAR(50))",
-                    "customer_id: Foreign key to Customer entity (INTEGER)",
-                    "order_date: Order placement timestamp (TIMESTAMP)",
-                    "order_type: Standard, Subscription, Return, Exchange (VARCHAR(20))",
-                    "order_source: Web, Mobile, Phone, In-Store, API (VARCHAR(20))",
-                    "order_status: Pending, Processing, Shipped, Delivered, Cancelled (VARCHAR(20))",
-                    "payment_status: Pending, Authorized, Captured, Refunded (VARCHAR(20))",
-                    "fulfillment_status: Pending, Partial, Complete, Cancelled (VARCHAR(20))",
-                    "currency_code: ISO 4217 currency code (VARCHAR(3))",
-                    "exchange_rate: Rate if different from base currency (DECIMAL(10,6))",
-                    "subtotal: Order total before taxes and fees (DECIMAL(12,2))",
-                    "tax_amount: Total tax charged (DECIMAL(12,2))",
-                    "shipping_amount: Shipping and handling charges (DECIMAL(12,2))",
-                    "discount_amount: Total discounts applied (DECIMAL(12,2))",
-                    "total_amount: Final order total (DECIMAL(12,2))",
-                    "billing_address_id: Foreign key to CustomerAddress (INTEGER)",
-                    "shipping_address_id: Foreign key to CustomerAddress (INTEGER)",
-                    "shipping_method: Delivery method selected (VARCHAR(100))",
-                    "tracking_number: Shipment tracking reference (VARCHAR(100))",
-                    "expected_delivery_date: Estimated delivery date (DATE)",
-                    "actual_delivery_date: Confirmed delivery date (DATE)",
-                    "gift_message: Customer gift message (TEXT)",
-                    "internal_notes: Staff notes and comments (TEXT)",
-                    "coupon_code: Applied discount code (VARCHAR(50))",
-                    "loyalty_points_used: Points redeemed for discount (INTEGER)",
-                    "loyalty_points_earned: Points earned from purchase (INTEGER)",
-                    "referral_source: How customer found the store (VARCHAR(100))",
-                    "sales_rep_id: Assigned sales representative (INTEGER)",
-                    "priority_level: Order processing priority 1-5 (INTEGER)",
-                    "requires_signature: Delivery signature required (BOOLEAN)",
-                    "is_gift: Order marked as gift (BOOLEAN)",
-                    "cancel_reason: Reason for cancellation (VARCHAR(255))",
-                    "cancelled_by: User who cancelled the order (VARCHAR(100))",
-                    "cancelled_date: Cancellation timestamp (TIMESTAMP)"
-                ],
-                "business_rules": [
-                    "Order number must be unique and sequential",
-                    "Total amount equals subtotal + tax + shipping - discounts",
-                    "Order status workflow: Pending → Processing → Shipped → Delivered",
-                    "Payment must be authorized before order processing",
-                    "Shipped orders cannot be cancelled, only returned",
-                    "Gift orders require separate billing and shipping addresses",
-                    "Loyalty points usage cannot exceed customer balance",
-                    "International orders require additional documentation",
-                    "Cancelled orders release inventory back to available stock",
-                    "Delivery signature required for orders over $500"
-                ]
-            },
-            {
-                "name": "OrderItem",
-                "business_name": "Order Line Item",
-                "description": """
-                Individual product line items within an order. Tracks quantity, pricing,
-                discounts, and fulfillment status for each product purchased. Supports
-                partial fulfillment and backorder management.
-                """,
-                "subject_area": "Order Management",
-                "attributes": [
-                    "order_item_id: Primary key, unique line item identifier (INTEGER)",
-                    "order_id: Foreign key to Order entity (INTEGER)",
-                    "product_id: Foreign key to Product entity (INTEGER)",
-                    "product_sku: Product SKU at time of order (VARCHAR(50))",
-                    "product_name: Product name at time of order (VARCHAR(255))",
-                    "quantity_ordered: Number of items ordered (INTEGER)",
-                    "quantity_shipped: Number of items shipped (INTEGER)",
-                    "quantity_cancelled: Number of items cancelled (INTEGER)",
-                    "unit_price: Price per item at time of order (DECIMAL(10,2))",
-                    "discount_percent: Percentage discount applied (DECIMAL(5,2))",
-                    "discount_amount: Dollar amount discount applied (DECIMAL(10,2))",
-                    "tax_percent: Tax rate applied (DECIMAL(5,3))",
-                    "tax_amount: Tax amount for this line item (DECIMAL(10,2))",
-                    "line_total: Total for this line item (DECIMAL(12,2))",
-                    "cost_price: Product cost at time of order (DECIMAL(10,2))",
-                    "margin_amount: Profit margin (line_total - cost) (DECIMAL(10,2))",
-                    "backorder_quantity: Quantity on backorder (INTEGER)",
-                    "expected_ship_date: Expected shipment date (DATE)",
-                    "actual_ship_date: Actual shipment date (DATE)",
-                    "serial_numbers: Product serial numbers if applicable (TEXT)",
-                    "personalization_text: Custom text for personalized items (TEXT)",
-                    "gift_wrap: Gift wrapping option selected (VARCHAR(50))",
-                    "special_instructions: Customer instructions (TEXT)"
-                ],
-                "business_rules": [
-                    "Quantity ordered must be greater than zero",
-                    "Quantity shipped cannot exceed quantity ordered",
-                    "Line total equals (unit_price * quantity) - discount + tax",
-                    "Cancelled quantity reduces from ordered quantity",
-                    "Backorder quantity cannot exceed ordered - shipped - cancelled",
-                    "Serial numbers required for serialized products",
-                    "Personalization adds to processing time",
-                    "Gift wrap incurs additional charges"
-                ]
-            },
+def compress_data(level=3):
+    """Write the zstd copy of realistic_erwin.json (needs the zstandard package)"""
+    if zstandard is None:
+        raise RuntimeError("compress_data() needs the zstandard package")
+    with open(DATA_PATH, "rb") as f:
+        raw = f.read()
+    with open(COMPRESSED_DATA_PATH, "wb") as f:
+        f.write(zstandard.ZstdCompressor(level=level).compress(raw))
 
-            # Inventory Management Subject Area
-            {
-                "name": "Inventory",
-                "business_name": "Inventory",
-                "description": """
-                Real-time inventory tracking across multiple warehouses and locations.
-                Manages stock levels, reservations, allocations, and movement history
-                with full audit trail and automated reorder capabilities.
-                """,
-                "subject_area": "Inventory Management",
-                "attributes": [
-                    "inventory_id: Primary key, unique inventory record (INTEGER)",
-                    "product_id: Foreign key to Product entity (INTEGER)",
-                    "warehouse_id: Foreign key to Warehouse entity (INTEGER)",
-                    "location_code: Specific warehouse location (VARCHAR(20))",
-                    "quantity_on_hand: Physical inventory count (INTEGER)",
-                    "quantity_available: Available for sale (on_hand - reserved) (INTEGER)",
-                    "quantity_reserved: Reserved for pending orders (INTEGER)",
-                    "quantity_on_order: Incoming from suppliers (INTEGER)",
-                    "quantity_allocated: Allocated to orders (INTEGER)",
-                    "reorder_point: Automatic reorder threshold (INTEGER)",
-                    "reorder_quantity: Standard reorder amount (INTEGER)",
-                    "max_stock_level: Maximum inventory to maintain (INTEGER)",
-                    "last_count_date: Most recent physical count (DATE)",
-                    "last_received_date: Most recent receipt (DATE)",
-                    "average_cost: Weighted average cost (DECIMAL(10,2))",
-                    "last_cost: Most recent purchase cost (DECIMAL(10,2))",
-                    "valuation_method: FIFO, LIFO, Average Cost (VARCHAR(20))",
-                    "abc_classification: A, B, C classification for importance (VARCHAR(1))",
-                    "cycle_count_frequency: Days between counts (INTEGER)",
-                    "is_serialized: Product requires serial tracking (BOOLEAN)",
-                    "is_lot_tracked: Product requires lot/batch tracking (BOOLEAN)",
-                    "expiration_date: Product expiration if applicable (DATE)",
-                    "quarantine_quantity: Items on quality hold (INTEGER)",
-                    "damaged_quantity: Damaged inventory count (INTEGER)"
-                ],
-                "business_rules": [
-                    "Quantity available cannot be negative",
-                    "Reserved quantity cannot exceed on-hand quantity",
-                    "Reorder point must be less than max stock level",
-                    "Serialized products require individual tracking",
-                    "Lot-tracked products require batch information",
-                    "Expired products cannot be sold",
-                    "Quarantined inventory not available for sale",
-                    "Cycle count frequency based on ABC classification"
-                ]
-            },
+@dataclass(frozen=True)
+class Entity:
+    """Read-only, slotted view of one entity in the data model"""
+    # Spelled out rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ("name", "business_name", "description", "subject_area", "attributes", "business_rules")
+    
+    name: str
+    business_name: str
+    description: str
+    subject_area: str
+    attributes: Tuple[str, ...]
+    business_rules: Tuple[str, ...]
+    
+    @classmethod
+    def from_dict(cls, entity):
+        """Build from an entry of get_realistic_erwin_data()['entities']"""
+        return cls(
+            name=entity['name'],
+            business_name=entity['business_name'],
+            description=entity['description'],
+            subject_area=entity['subject_area'],
+            attributes=tuple(entity['attributes']),
+            business_rules=tuple(entity['business_rules'])
+        )
+    
+    def to_dict(self):
+        """Plain-dict form, shaped like the JSON entry"""
+        return {
+            "name": self.name,
+            "business_name": self.business_name,
+            "description": self.description,
+            "subject_area": self.subject_area,
+            "attributes": list(self.attributes),
+            "business_rules": list(self.business_rules)
+        }
 
-            # Financial Management Subject Area
-            {
-                "name": "Payment",
-                "business_name": "Payment Transaction",
-                "description": """
-                Payment processing and transaction management supporting multiple payment
-                methods, currencies, and processors. Tracks authorization, capture,
-                refund, and chargeback processes with full PCI compliance.
-                """,
-                "subject_area": "Financial Management",
-                "attributes": [
-                    "payment_id: Primary key, unique payment identifier (INTEGER)",
-                    "order_id: Foreign key to Order entity (INTEGER)",
-                    "payment_method: Credit Card, PayPal, Bank Transfer, etc. (VARCHAR(50))",
-                    "payment_processor: Stripe, PayPal, Square, etc. (VARCHAR(50))",
-                    "transaction_id: Processor transaction reference (VARCHAR(100))",
-                    "authorization_code: Payment authorization code (VARCHAR(50))",
-                    "payment_status: Pending, Authorized, Captured, Failed, Refunded (VARCHAR(20))",
-                    "currency_code: ISO 4217 currency code (VARCHAR(3))",
-                    "amount: Payment amount in specified currency (DECIMAL(12,2))",
-                    "fee_amount: Processing fees charged (DECIMAL(10,2))",
-                    "net_amount: Amount after fees (DECIMAL(12,2))",
-                    "exchange_rate: Currency conversion rate (DECIMAL(10,6))",
-                    "card_type: Visa, MasterCard, Amex, etc. (VARCHAR(20))",
-                    "card_last_four: Last 4 digits of card (VARCHAR(4))",
-                    "card_expiry_month: Card expiration month (INTEGER)",
-                    "card_expiry_year: Card expiration year (INTEGER)",
-                    "billing_address_match: Address verification result (BOOLEAN)",
-                    "cvv_match: CVV verification result (BOOLEAN)",
-                    "risk_score: Fraud risk assessment 0-100 (INTEGER)",
-                    "gateway_response: Detailed processor response (TEXT)",
-                    "authorization_date: Initial authorization timestamp (TIMESTAMP)",
-                    "capture_date: Payment capture timestamp (TIMESTAMP)",
-                    "settlement_date: Funds settlement date (DATE)",
-                    "refund_amount: Total amount refunded (DECIMAL(12,2))",
-                    "refund_reason: Reason for refund (VARCHAR(255))",
-                    "chargeback_amount: Chargeback amount if applicable (DECIMAL(12,2))",
-                    "chargeback_reason: Chargeback reason code (VARCHAR(100))",
-                    "is_recurring: Recurring payment flag (BOOLEAN)",
-                    "recurring_frequency: Payment frequency (VARCHAR(20))"
-                ],
-                "business_rules": [
-                    "Payment amount must match order total",
-                    "Authorization required before capture",
-                    "Refunds cannot exceed captured amount",
-                    "High-risk transactions require manual review",
-                    "PCI compliance required for card data handling",
-                    "Failed payments trigger retry logic",
-                    "Chargebacks initiate dispute process",
-                    "Recurring payments require customer consent"
-                ]
-            }
-        ],
-        "relationships": [
-            {
-                "name": "Customer_Has_Addresses",
-                "parent_entity": "Customer",
-                "child_entity": "CustomerAddress",
-                "relationship_type": "One-to-Many",
-                "description": "Each customer can have multiple addresses for billing and shipping"
-            },
-            {
-                "name": "Customer_Places_Orders",
-                "parent_entity": "Customer", 
-                "child_entity": "Order",
-                "relationship_type": "One-to-Many",
-                "description": "Customers can place multiple orders over time"
-            },
-            {
-                "name": "Order_Contains_Items",
-                "parent_entity": "Order",
-                "child_entity": "OrderItem", 
-                "relationship_type": "One-to-Many",
-                "description": "Each order contains one or more line items"
-            },
-            {
-                "name": "Product_Ordered_As_Items",
-                "parent_entity": "Product",
-                "child_entity": "OrderItem",
-                "relationship_type": "One-to-Many", 
-                "description": "Products can appear in multiple order line items"
-            },
-            {
-                "name": "Category_Contains_Products",
-                "parent_entity": "ProductCategory",
-                "child_entity": "Product",
-                "relationship_type": "One-to-Many",
-                "description": "Product categories contain multiple products"
-            },
-            {
-                "name": "Product_Has_Inventory",
-                "parent_entity": "Product",
-                "child_entity": "Inventory",
-                "relationship_type": "One-to-Many",
-                "description": "Products have inventory records across multiple locations"
-            },
-            {
-                "name": "Order_Has_Payments",
-                "parent_entity": "Order",
-                "child_entity": "Payment",
-                "relationship_type": "One-to-Many",
-                "description": "Orders can have multiple payment transactions"
-            }
-        ]
-    }
+@functools.lru_cache(maxsize=1)
+def get_entities():
+    """The model's entities as Entity objects, in file order"""
+    return tuple(Entity.from_dict(entity) for entity in get_realistic_erwin_data()['entities'])
 
-class RealisticErwinLoader:
-    def __init__(self):
-        print("🏗️ Initializing Realistic erwin Data Loader...")
+_TOKEN_RE = re.compile(r"\$\{(\w+)\}")
+
+def _expand(obj, table):
+    """Replace ${KEY} tokens with their phrase from the token table"""
+    if isinstance(obj, str):
+        if "${" not in obj:
+            return obj
+        return _TOKEN_RE.sub(lambda m: table[m.group(1)], obj)
+    if isinstance(obj, list):
+        return [_expand(item, table) for item in obj]
+    if isinstance(obj, dict):
+        return {key: _expand(value, table) for key, value in obj.items()}
+    return obj
+
+def _intern_model(data):
+    """Share one string object for the names repeated across the model"""
+    # Entity names and subject areas recur in every relationship, summary and
+    # metadata dict built from the model; the JSON parser allocates a copy each time
+    intern = sys.intern
+    for entity in data['entities']:
+        entity['name'] = intern(entity['name'])
+        entity['subject_area'] = intern(entity['subject_area'])
+    for relationship in data['relationships']:
+        relationship['parent_entity'] = intern(relationship['parent_entity'])
+        relationship['child_entity'] = intern(relationship['child_entity'])
+        relationship['relationship_type'] = intern(relationship['relationship_type'])
+    return data
+
+def _index_model(data):
+    """Add name lookups: entities_by_name plus parent_ref/child_ref on relationships"""
+    # The dict values alias the entries of data['entities'], which keeps the file order
+    entities_by_name = {entity['name']: entity for entity in data['entities']}
+    data['entities_by_name'] = entities_by_name
+    for relationship in data['relationships']:
+        # None when the relationship names an entity the model doesn't define
+        relationship['parent_ref'] = entities_by_name.get(relationship['parent_entity'])
+        relationship['child_ref'] = entities_by_name.get(relationship['child_entity'])
+    return data
+
+@functools.lru_cache(maxsize=1)
+def _get_normalizer():
+    """numba row normalization kernel, or None without numba"""
+    # Built on first use: importing numba pulls in llvmlite, far more than
+    # get_realistic_erwin_data() callers should pay for
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+    
+    # Split into 1-D/2-D kernels: numba can't type np.linalg.norm(..., axis=1)
+    @njit(fastmath=True)
+    def normalize_1d(vector):
+        """Scale one embedding to unit length"""
+        total = 0.0
+        for j in range(vector.shape[0]):
+            total += vector[j] * vector[j]
+        inv = 1.0 / np.sqrt(total) if total > 0.0 else 0.0
+        out = np.empty_like(vector)
+        for j in range(vector.shape[0]):
+            out[j] = vector[j] * inv
+        return out
+    
+    @njit(parallel=True, fastmath=True)
+    def normalize_2d(matrix):
+        """Scale every row of an embedding matrix to unit length"""
+        out = np.empty_like(matrix)
+        for i in prange(matrix.shape[0]):
+            out[i] = normalize_1d(matrix[i])
+        return out
+    
+    return normalize_2d
+
+COLLECTION_NAME = "enterprise-erwin-model"
+
+# Record id templates (name fragment, content hash), bound once instead of
+# re-parsed as f-strings per record
+_ENTITY_ID = "entity_{}_{}".format
+_RELATIONSHIP_ID = "relationship_{}_{}".format
+_SUBJECT_AREA_ID = "subject_area_{}_{}".format
+
+# Document templates, kept byte-for-byte as the layout parse_sections reads
+# back (and that the content-hashed ids are computed over)
+_ENTITY_DOC = """
+        Entity: {name}
+        Business Name: {business_name}
+        Subject Area: {subject_area}
         
-        # Set up ChromaDB
-        self.client = chromadb.PersistentClient(path="./enterprise_chroma_db")
+        Description: {description}
         
-        # Create new collection for enterprise data
-        try:
-            self.client.delete_collection("enterprise-erwin-model")
-        except:
-            pass
-            
-        self.collection = self.client.create_collection("enterprise-erwin-model")
+        Attributes ({attribute_count} total):
+        {attribute_lines}
+        
+        Business Rules ({rule_count} total):
+        {rule_lines}
+        """.format
+
+_RELATIONSHIP_DOC = """
+        Relationship: {name}
+        Type: {relationship_type}
+        Parent Entity: {parent_entity}
+        Child Entity: {child_entity}
         
-        # Set up embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        Description: {description}
+        
+        This relationship connects {parent_entity} to {child_entity} 
+        in a {relationship_type} relationship, meaning {description}
+        """.format
+
+_SUBJECT_AREA_DOC = """
+        Subject Area: {subject_area}
+        
+        Overview: The {subject_area} subject area contains {entity_count} entities that work together 
+        to manage and track information related to {subject_area_lower} operations.
+        
+        Entities in this Subject Area:
+        {entity_lines}
+        
+        Total Attributes: {total_attributes}
+        Total Business Rules: {total_rules}
+        
+        This subject area handles all data requirements for {subject_area_lower} including 
+        data storage, business logic, and operational requirements.
+        """.format
+
+def _id_fragment(name):
+    """Lowercase, underscore-joined name used inside record ids"""
+    return sys.intern(name.lower().replace(' ', '_'))
+
+def _embed(model, texts):
+    """Normalized float32 embeddings for a list of documents"""
+    if model.device.type == "cuda":
+        # Keep the half-precision batch on the GPU: normalize and upcast there,
+        # then copy to the host once rather than row by row via convert_to_numpy
+        embeddings = model.encode(
+            texts,
+            batch_size=64,
+            convert_to_tensor=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.float().cpu().numpy()
+    
+    # encode() already sorts by length so each mini-batch pads to similar sizes;
+    # with numba available the normalization runs in the compiled kernel instead
+    normalize = _get_normalizer()
+    embeddings = model.encode(
+        texts,
+        batch_size=64,
+        convert_to_numpy=True,
+        normalize_embeddings=normalize is None,
+        show_progress_bar=False
+    )
+    embeddings = embeddings.astype(np.float32, copy=False)
+    if normalize is not None:
+        embeddings = normalize(embeddings)
+    return embeddings
+
+def _load_cpu_model():
+    """MiniLM for CPU encoding: the O3-optimized FP32 ONNX export when available"""
+    from sentence_transformers import SentenceTransformer
+    
+    # Bulk loading is throughput-bound, so the graph-optimized FP32 export beats
+    # the INT8 one the chatbots use for single queries; fall back to PyTorch
+    try:
+        return SentenceTransformer(
+            'all-MiniLM-L6-v2',
+            backend='onnx',
+            model_kwargs={'file_name': 'onnx/model_O3.onnx'}
+        )
+    except Exception as e:
+        print(f"⚠️  ONNX O3 model unavailable ({e}), using PyTorch backend")
+        return SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+
+# Per-process model for the ProcessPoolExecutor workers, loaded by the pool initializer
+_worker_model = None
+
+def _init_worker():
+    """Load the encoder once when a worker process starts"""
+    global _worker_model
+    _worker_model = _load_cpu_model()
+
+def _encode_chunk(texts):
+    """Embed one chunk of documents inside a worker process"""
+    return _embed(_worker_model, texts)
+
+# SQLite settings for the one-shot bulk load, and the safe ones finalize() restores
+BULK_LOAD_PRAGMAS = ("journal_mode=OFF", "synchronous=OFF", "temp_store=MEMORY", "locking_mode=EXCLUSIVE", "cache_size=-262144")
+SAFE_PRAGMAS = ("locking_mode=NORMAL", "journal_mode=WAL", "synchronous=NORMAL")
+
+# HNSW index settings fixed at collection creation (the chatbots read hnsw:space back)
+COLLECTION_METADATA = {"hnsw:space": "cosine", "hnsw:construction_ef": 100, "hnsw:M": 16, "hnsw:search_ef": 50}
+
+# The index-side counterpart of the pragmas: bigger in-memory batches between
+# index syncs while bulk loading, Chroma's defaults once finalize() runs
+BULK_LOAD_HNSW = {"hnsw:batch_size": 500, "hnsw:sync_threshold": 2000}
+DEFAULT_HNSW = {"batch_size": 100, "sync_threshold": 1000}
+
+class RealisticErwinLoader:
+    # Records per collection.add call, and documents per encode chunk
+    BATCH_SIZE = 200
+    EMBED_CHUNK = 64
+    
+    def __init__(self, mode="embedded", host="localhost", port=8000, persistent=True,
+                 path="./enterprise_chroma_db", bulk_load=False, concurrency=4, quantize=False,
+                 workers=0, cache_dir="./embedding_cache"):
+        """Use RealisticErwinLoader.create() - it also connects to ChromaDB"""
+        print("🏗️ Initializing Realistic erwin Data Loader...")
         
+        if mode not in ("embedded", "server"):
+            raise ValueError(f"Unknown mode {mode!r} (expected 'embedded' or 'server')")
+        
+        # Heavy imports (torch, transformers, chromadb) are deferred to here so
+        # importing this module for get_realistic_erwin_data() stays cheap
+        import chromadb
+        import torch
+        from sentence_transformers import SentenceTransformer
+        
+        # 'embedded' writes to the local SQLite store at `path` (or only to memory
+        # with persistent=False, see snapshot()), 'server' talks to a running
+        # Chroma server (`chroma run --path ./enterprise_chroma_db`)
+        self._chromadb = chromadb
+        self.mode = mode
+        self.host = host
+        self.port = port
+        self.persistent = persistent
+        self.path = path
+        self.bulk_load = bulk_load
+        # Round embeddings through int8 to A/B retrieval accuracy; the embedding
+        # cache then keeps the int8 codes and their scale instead of float32
+        self.quantize = quantize
+        self.client = None
+        self.collection = None
+        
+        # SQLite pools connections per thread, so every embedded call runs on one
+        # worker thread - that way the bulk-load pragmas cover all of the writes
+        self._executor = ThreadPoolExecutor(max_workers=1) if mode == "embedded" else None
+        
+        # workers > 0 spreads encode over that many processes (each loads its own
+        # CPU model); spawned, since forking after torch is imported isn't safe
+        self.workers = workers
+        # Raw embeddings cached on disk by document hash (None disables the cache)
+        self.cache_dir = cache_dir
+        self._pool = None
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        
+        # Records waiting for the next batched collection.add
+        self._buf = {key: [] for key in ("ids", "documents", "metadatas", "embeddings")}
+        
+        # Up to `concurrency` batches in flight at once, so the server's WAL writes
+        # overlap with building the next batch
+        self._sem = asyncio.Semaphore(concurrency)
+        self._inflight = []
+        
+        # Set up embeddings (one model instance for the whole load); with a pool
+        # the workers do all of the encoding, so the parent holds no model
+        if self._pool is not None:
+            self.embedding_model = None
+        elif torch.cuda.is_available():
+            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device='cuda')
+            # Half precision on tensor cores: bf16 from Ampere (sm_80) on, fp16 before;
+            # embed_texts casts the encode output back to float32
+            if torch.cuda.get_device_capability()[0] >= 8:
+                self.embedding_model.to(torch.bfloat16)
+            else:
+                self.embedding_model.half()
+        else:
+            self.embedding_model = _load_cpu_model()
+    
+    @classmethod
+    async def create(cls, **kwargs):
+        """Build a loader and open its (emptied) enterprise collection"""
+        loader = cls(**kwargs)
+        await loader._connect()
         print("✅ Realistic data loader ready!")
+        return loader
+    
+    def embed_texts(self, texts):
+        """Embed a list of documents in batched encode calls"""
+        if self.embedding_model is None:
+            if self._pool is None:
+                raise RuntimeError("The embedding workers were shut down by finalize()")
+            return self._pool.submit(_encode_chunk, texts).result()
+        return _embed(self.embedding_model, texts)
+    
+    async def _embed_chunks(self, texts):
+        """Yield (offset, embeddings) for each EMBED_CHUNK documents, in order"""
+        starts = range(0, len(texts), self.EMBED_CHUNK)
+        if self._pool is None:
+            # encode is CPU/GPU bound, keep it off the event loop
+            for start in starts:
+                yield start, await asyncio.to_thread(self.embed_texts, texts[start:start + self.EMBED_CHUNK])
+            return
+        
+        # Submit every chunk up front so all workers stay busy
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._pool, _encode_chunk, texts[start:start + self.EMBED_CHUNK])
+            for start in starts
+        ]
+        for start, future in zip(starts, futures):
+            yield start, await future
+    
+    def _cache_path(self, text):
+        """Cache file for a document's embedding"""
+        key = sha256(f"all-MiniLM-L6-v2\0{text}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, key + (".int8.npy" if self.quantize else ".npy"))
+    
+    def _cached_embedding(self, text):
+        """Cached embedding for a document (memory-mapped when float32), or None"""
+        if self.cache_dir is None:
+            return None
+        try:
+            if self.quantize:
+                # The codes, then their scale, saved back to back in one file
+                with open(self._cache_path(text), "rb") as f:
+                    return self.dequantize_embeddings(np.load(f), np.load(f))
+            return np.load(self._cache_path(text), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+    
+    def _cache_embeddings(self, texts, embeddings):
+        """Save freshly computed embeddings for the next run, returning the vectors to store"""
+        if self.quantize:
+            # HNSW still gets float32, but only values an int8 store could hold;
+            # the cache keeps the int8 codes themselves, a quarter of the bytes
+            codes, scales = self.quantize_embeddings(embeddings)
+            embeddings = self.dequantize_embeddings(codes, scales)
+        if self.cache_dir is None:
+            return embeddings
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for i, text in enumerate(texts):
+            # Write then rename, so an interrupted run never leaves a torn file
+            path = self._cache_path(text)
+            with open(path + ".tmp", "wb") as f:
+                if self.quantize:
+                    np.save(f, codes[i])
+                    np.save(f, scales[i])
+                else:
+                    np.save(f, embeddings[i])
+            os.replace(path + ".tmp", path)
+        return embeddings
+    
+    async def _queue_embedded(self, records, embeddings):
+        """Queue records with their embeddings for the batched adds"""
+        for (record_id, document, metadata), embedding in zip(records, embeddings):
+            await self._enqueue(record_id, document, metadata, embedding)
+    
+    @staticmethod
+    def quantize_embeddings(embeddings):
+        """Symmetric per-vector int8 quantization, returns (codes, scales)"""
+        scales = np.max(np.abs(embeddings), axis=1, keepdims=True) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(embeddings / scales).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    
+    @staticmethod
+    def dequantize_embeddings(codes, scales):
+        """Inverse of quantize_embeddings"""
+        return codes.astype(np.float32) * scales
+    
+    def _doc_id(self, text, metadata):
+        """Content hash used in record ids, so unchanged records keep their id"""
+        # Quantized vectors differ from float ones, so they hash to different ids
+        person = b"int8" if self.quantize else b""
+        digest = blake2b(text.encode(), digest_size=16, person=person)
+        digest.update(json.dumps(metadata, sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    async def _connect(self):
+        """Set up the ChromaDB client and open the enterprise collection"""
+        if self.mode == "server":
+            self.client = await self._chromadb.AsyncHttpClient(host=self.host, port=self.port)
+        elif not self.persistent:
+            # Seeding the small demo model straight into RAM skips every SQLite write
+            self.client = self._chromadb.EphemeralClient()
+        else:
+            self.client = self._chromadb.PersistentClient(path=self.path)
+            if self.bulk_load:
+                await self._call(self._set_pragmas, BULK_LOAD_PRAGMAS)
+        
+        # Reuse the existing collection so load_data only writes what changed.
+        # No embedding_function is attached: Chroma persists it, and every reader
+        # opening the collection would then load its own extra copy of MiniLM
+        # Before chromadb 1.0 the bulk settings could only be undone by rewriting
+        # the metadata, which loses hnsw:space, so they are only used from 1.0 on
+        bulk_hnsw = self.bulk_load and self._chroma_v1()
+        metadata = dict(COLLECTION_METADATA, **BULK_LOAD_HNSW) if bulk_hnsw else COLLECTION_METADATA
+        self.collection = await self._call(
+            self.client.get_or_create_collection,
+            COLLECTION_NAME,
+            metadata=metadata
+        )
+        
+        # A collection from before the HNSW settings (l2 space) has to be rebuilt
+        if (self.collection.metadata or {}).get("hnsw:space") != COLLECTION_METADATA["hnsw:space"]:
+            await self._call(self.client.delete_collection, COLLECTION_NAME)
+            self.collection = await self._call(
+                self.client.create_collection,
+                COLLECTION_NAME,
+                metadata=metadata
+            )
+    
+    async def _call(self, method, *args, **kwargs):
+        """Run a ChromaDB call without blocking the event loop"""
+        if self.mode == "server":
+            # AsyncHttpClient methods are coroutines already
+            return await method(*args, **kwargs)
+        # The embedded client blocks on SQLite writes, so push it to the worker thread
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    def _chroma_v1(self):
+        """True for chromadb >= 1.0 (Rust core, collection configurations)"""
+        return int(self._chromadb.__version__.split(".")[0]) >= 1
+    
+    def _set_pragmas(self, pragmas):
+        """Apply SQLite pragmas to the embedded client's connection"""
+        # chromadb 0.4/0.5 keep the SQLite pool on the server object behind the
+        # Client; from 1.0 SQLite runs inside the Rust bindings, out of Python's reach
+        if self._chroma_v1():
+            print("⚠️ chromadb >= 1.0 manages SQLite natively, keeping its default pragmas")
+            return
+        try:
+            conn = self.client._server._sysdb._conn_pool.connect()
+        except AttributeError:
+            print("⚠️ SQLite connection not reachable, keeping default pragmas")
+            return
+        
+        for pragma in pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        # Leaving EXCLUSIVE locking only takes effect on the next read
+        conn.execute("SELECT count(*) FROM sqlite_master")
+    
+    async def _enqueue(self, record_id, document, metadata, embedding):
+        """Buffer one record, writing a batch once BATCH_SIZE records are pending"""
+        self._buf["ids"].append(record_id)
+        self._buf["documents"].append(document)
+        self._buf["metadatas"].append(metadata)
+        self._buf["embeddings"].append(embedding)
+        if len(self._buf["ids"]) >= self.BATCH_SIZE:
+            await self._flush()
+    
+    async def _flush(self):
+        """Start writing all pending records as a single collection.add"""
+        if not self._buf["ids"]:
+            return
+        
+        # Hand the lists to ChromaDB and start fresh ones for the next batch
+        batch = self._buf
+        self._buf = {key: [] for key in batch}
+        # One contiguous float32 matrix instead of per-vector Python float lists
+        batch["embeddings"] = np.asarray(batch["embeddings"], dtype=np.float32)
+        
+        # Waiting for a free slot here also caps how many batches sit in memory
+        await self._sem.acquire()
+        self._inflight.append(asyncio.create_task(self._write(batch)))
+    
+    async def _write(self, batch):
+        """Send one batch to ChromaDB, freeing its semaphore slot afterwards"""
+        try:
+            await self._call(self.collection.add, **batch)
+        finally:
+            self._sem.release()
+    
+    async def _drain(self):
+        """Flush the buffer and wait for every in-flight write"""
+        await self._flush()
+        inflight, self._inflight = self._inflight, []
+        await asyncio.gather(*inflight)
+    
+    async def finalize(self):
+        """Stop the embedding workers and restore safe SQLite and HNSW settings"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        
+        if not self.bulk_load:
+            return
+        
+        if self.mode == "embedded" and self.persistent:
+            await self._call(self._set_pragmas, SAFE_PRAGMAS)
+        
+        # Rewriting the metadata would drop hnsw:space, so go through the
+        # collection configuration instead (only 1.x had the bulk settings applied)
+        if self._chroma_v1():
+            await self._call(self.collection.modify, configuration={"hnsw": DEFAULT_HNSW})
     
-    def load_data(self):
+    async def snapshot(self, dest=None):
+        """Write the collection to a persistent store at dest in one batched add"""
+        # Meant for persistent=False: load in memory, then hit disk exactly once
+        if self.mode != "embedded":
+            raise ValueError("snapshot() needs mode='embedded' (a server persists its own collections)")
+        dest = dest or self.path
+        data = await self._call(self.collection.get, include=["embeddings", "documents", "metadatas"])
+        
+        def write():
+            client = self._chromadb.PersistentClient(path=dest)
+            try:
+                client.delete_collection(COLLECTION_NAME)
+            except Exception:
+                pass
+            collection = client.create_collection(COLLECTION_NAME, metadata=COLLECTION_METADATA)
+            collection.add(
+                ids=data['ids'],
+                embeddings=np.asarray(data['embeddings'], dtype=np.float32),
+                documents=data['documents'],
+                metadatas=data['metadatas']
+            )
+        
+        await self._call(write)
+        print(f"💾 Saved {len(data['ids'])} documents to {dest}")
+    
+    async def load_data(self):
         """Load the complete enterprise data model"""
         print("\n📥 Loading realistic enterprise erwin data...")
         
@@ -501,172 +630,208 @@ class RealisticErwinLoader:
         print(f"📋 Loading model: {model_info['name']} v{model_info['version']}")
         
         # Load entities
+        model_entities = get_entities()
+        # Group by subject area and total the summary counts in the same pass
         entities_by_subject = {}
-        for entity in data['entities']:
-            subject_area = entity['subject_area']
+        attr_count_by_subject = {}
+        rule_count_by_subject = {}
+        for entity in model_entities:
+            subject_area = entity.subject_area
             if subject_area not in entities_by_subject:
                 entities_by_subject[subject_area] = []
+                attr_count_by_subject[subject_area] = 0
+                rule_count_by_subject[subject_area] = 0
             entities_by_subject[subject_area].append(entity)
+            attr_count_by_subject[subject_area] += len(entity.attributes)
+            rule_count_by_subject[subject_area] += len(entity.business_rules)
         
         print(f"\n📊 Model Statistics:")
         print(f"  • Total Entities: {len(data['entities'])}")
         print(f"  • Subject Areas: {len(entities_by_subject)}")
         print(f"  • Relationships: {len(data['relationships'])}")
         
+        max_attributes = max((len(entity.attributes) for entity in model_entities), default=0)
+        print(f"  • Total Attributes: {sum(attr_count_by_subject.values())} (max {max_attributes} per entity)")
+        
         for subject_area, entities in entities_by_subject.items():
             print(f"  • {subject_area}: {len(entities)} entities")
         
+        # Validate relationships against the entity index
+        for relationship in data['relationships']:
+            if relationship['parent_ref'] is None or relationship['child_ref'] is None:
+                print(f"  ⚠️ {relationship['name']} references an entity missing from the model")
+        
+        # Build every record first so all documents are embedded in one encode call
+        records = []
+        
         # Add entities to ChromaDB
         print(f"\n📥 Adding entities to ChromaDB...")
-        for i, entity in enumerate(data['entities'], 1):
-            self._add_entity(entity, i, len(data['entities']))
+        for i, entity in enumerate(model_entities, 1):
+            records.append(self._entity_record(entity, i, len(model_entities)))
         
         # Add relationships
         print(f"\n🔗 Adding relationships...")
         for i, relationship in enumerate(data['relationships'], 1):
-            self._add_relationship(relationship, i, len(data['relationships']))
+            records.append(self._relationship_record(relationship, i, len(data['relationships'])))
         
         # Add subject area summaries
         print(f"\n📂 Adding subject area summaries...")
         for subject_area, entities in entities_by_subject.items():
-            self._add_subject_area_summary(subject_area, entities)
+            records.append(self._subject_area_record(
+                subject_area,
+                entities,
+                attr_count_by_subject[subject_area],
+                rule_count_by_subject[subject_area]
+            ))
+        
+        # Ids hash the document text: ids already stored need no work, stored ids
+        # the model no longer produces are stale
+        wanted = {record[0] for record in records}
+        stored = set((await self._call(self.collection.get, include=[]))['ids'])
+        stale = list(stored - wanted)
+        if stale:
+            print(f"\n🧹 Removing {len(stale)} outdated documents...")
+            await self._call(self.collection.delete, ids=stale)
+        records = [record for record in records if record[0] not in stored]
+        
+        if not records:
+            print("\n✅ Enterprise data model already up to date!")
+            return
+        
+        # Documents embedded on an earlier run come straight from the disk cache
+        cached = [self._cached_embedding(document) for _, document, _ in records]
+        hits = [record for record, embedding in zip(records, cached) if embedding is not None]
+        if hits:
+            print(f"\n💾 Reusing {len(hits)} cached embeddings...")
+            await self._queue_embedded(hits, np.asarray([embedding for embedding in cached if embedding is not None]))
+        records = [record for record, embedding in zip(records, cached) if embedding is None]
+        
+        if records:
+            print(f"\n🧠 Embedding {len(records)} documents...")
+        # Each chunk is queued as soon as it is embedded, so encoding the next
+        # chunk overlaps with the batched adds already in flight
+        texts = [document for _, document, _ in records]
+        async for start, embeddings in self._embed_chunks(texts):
+            embeddings = self._cache_embeddings(texts[start:start + len(embeddings)], embeddings)
+            await self._queue_embedded(records[start:start + len(embeddings)], embeddings)
+        
+        await self._drain()
         
         print(f"\n✅ Successfully loaded complete enterprise data model!")
         
         # Show final statistics
-        stats = self.get_collection_stats()
+        stats = await self.get_collection_stats()
         print(f"\n📊 Final Collection Statistics:")
         for key, value in stats.items():
             print(f"  • {key}: {value}")
     
-    def _add_entity(self, entity, current, total):
-        """Add individual entity to ChromaDB"""
-        print(f"  [{current:2d}/{total}] Adding {entity['name']} ({entity['subject_area']})")
+    def _entity_record(self, entity, current, total):
+        """Build the ChromaDB record for one entity"""
+        print(f"  [{current:2d}/{total}] Adding {entity.name} ({entity.subject_area})")
         
         # Create comprehensive text representation
-        text_content = f"""
-        Entity: {entity['name']}
-        Business Name: {entity['business_name']}
-        Subject Area: {entity['subject_area']}
-        
-        Description: {entity['description']}
-        
-        Attributes ({len(entity['attributes'])} total):
-        {chr(10).join(['• ' + attr for attr in entity['attributes']])}
-        
-        Business Rules ({len(entity['business_rules'])} total):
-        {chr(10).join(['• ' + rule for rule in entity['business_rules']])}
-        """
-        
-        # Create embedding
-        embedding = self.embedding_model.encode(text_content)
-        
-        # Add to ChromaDB
-        self.collection.add(
-            embeddings=[embedding.tolist()],
-            documents=[text_content],
-            metadatas={
-                "type": "entity",
-                "entity_name": entity['name'],
-                "business_name": entity['business_name'],
-                "subject_area": entity['subject_area'],
-                "attribute_count": len(entity['attributes']),
-                "rule_count": len(entity['business_rules'])
-            },
-            ids=[f"entity_{entity['name'].lower().replace(' ', '_')}"]
+        text_content = _ENTITY_DOC(
+            name=entity.name,
+            business_name=entity.business_name,
+            subject_area=entity.subject_area,
+            description=entity.description,
+            attribute_count=len(entity.attributes),
+            attribute_lines="\n".join(f"• {attr}" for attr in entity.attributes),
+            rule_count=len(entity.business_rules),
+            rule_lines="\n".join(f"• {rule}" for rule in entity.business_rules)
+        )
+        
+        metadata = {
+            "type": "entity",
+            "entity_name": entity.name,
+            "business_name": entity.business_name,
+            "subject_area": entity.subject_area,
+            "attribute_count": len(entity.attributes),
+            "rule_count": len(entity.business_rules),
+            # Pre-parsed fields so the web formatters don't re-split the document
+            "description": " ".join(entity.description.split()),
+            "sample_attributes": json.dumps(list(entity.attributes[:3]))
+        }
+        
+        return (
+            _ENTITY_ID(_id_fragment(entity.name), self._doc_id(text_content, metadata)),
+            text_content,
+            metadata
         )
     
-    def _add_relationship(self, relationship, current, total):
-        """Add relationship to ChromaDB"""
+    def _relationship_record(self, relationship, current, total):
+        """Build the ChromaDB record for one relationship"""
         print(f"  [{current:2d}/{total}] Adding relationship: {relationship['name']}")
         
-        text_content = f"""
-        Relationship: {relationship['name']}
-        Type: {relationship['relationship_type']}
-        Parent Entity: {relationship['parent_entity']}
-        Child Entity: {relationship['child_entity']}
-        
-        Description: {relationship['description']}
-        
-        This relationship connects {relationship['parent_entity']} to {relationship['child_entity']} 
-        in a {relationship['relationship_type']} relationship, meaning {relationship['description']}
-        """
-        
-        embedding = self.embedding_model.encode(text_content)
-        
-        self.collection.add(
-            embeddings=[embedding.tolist()],
-            documents=[text_content],
-            metadatas={
-                "type": "relationship",
-                "relationship_name": relationship['name'],
-                "parent_entity": relationship['parent_entity'],
-                "child_entity": relationship['child_entity'],
-                "relationship_type": relationship['relationship_type']
-            },
-            ids=[f"relationship_{relationship['name'].lower().replace(' ', '_')}"]
+        text_content = _RELATIONSHIP_DOC(**relationship)
+        
+        metadata = {
+            "type": "relationship",
+            "relationship_name": relationship['name'],
+            "parent_entity": relationship['parent_entity'],
+            "child_entity": relationship['child_entity'],
+            "relationship_type": relationship['relationship_type'],
+            "description": relationship['description']
+        }
+        
+        return (
+            _RELATIONSHIP_ID(_id_fragment(relationship['name']), self._doc_id(text_content, metadata)),
+            text_content,
+            metadata
         )
     
-    def _add_subject_area_summary(self, subject_area, entities):
-        """Add subject area overview to ChromaDB"""
+    def _subject_area_record(self, subject_area, entities, total_attributes, total_rules):
+        """Build the ChromaDB record for a subject area overview"""
         print(f"  📂 Adding summary for {subject_area}")
         
-        entity_names = [entity['name'] for entity in entities]
-        total_attributes = sum(len(entity['attributes']) for entity in entities)
-        total_rules = sum(len(entity['business_rules']) for entity in entities)
+        entity_names = [entity.name for entity in entities]
         
-        text_content = f"""
-        Subject Area: {subject_area}
-        
-        Overview: The {subject_area} subject area contains {len(entities)} entities that work together 
-        to manage and track information related to {subject_area.lower()} operations.
-        
-        Entities in this Subject Area:
-        {chr(10).join(['• ' + name for name in entity_names])}
-        
-        Total Attributes: {total_attributes}
-        Total Business Rules: {total_rules}
+        text_content = _SUBJECT_AREA_DOC(
+            subject_area=subject_area,
+            subject_area_lower=subject_area.lower(),
+            entity_count=len(entities),
+            entity_lines="\n".join(f"• {name}" for name in entity_names),
+            total_attributes=total_attributes,
+            total_rules=total_rules
+        )
         
-        This subject area handles all data requirements for {subject_area.lower()} including 
-        data storage, business logic, and operational requirements.
-        """
-        
-        embedding = self.embedding_model.encode(text_content)
-        
-        self.collection.add(
-            embeddings=[embedding.tolist()],
-            documents=[text_content],
-            metadatas={
-                "type": "subject_area",
-                "subject_area": subject_area,
-                "entity_count": len(entities),
-                "total_attributes": total_attributes,
-                "total_rules": total_rules
-            },
-            ids=[f"subject_area_{subject_area.lower().replace(' ', '_')}"]
+        metadata = {
+            "type": "subject_area",
+            "subject_area": subject_area,
+            "entity_count": len(entities),
+            "total_attributes": total_attributes,
+            "total_rules": total_rules,
+            "entity_list": json.dumps(entity_names)
+        }
+        
+        return (
+            _SUBJECT_AREA_ID(_id_fragment(subject_area), self._doc_id(text_content, metadata)),
+            text_content,
+            metadata
         )
     
-    def get_collection_stats(self):
+    async def get_collection_stats(self):
         """Get detailed collection statistics"""
         try:
-            all_data = self.collection.get(include=["metadatas"])
+            all_data = await self._call(self.collection.get, include=["metadatas"])
+            metadatas = all_data['metadatas']
+            
+            # Count by type and entities by subject area in one pass
+            type_counts = Counter()
+            subject_areas = Counter()
+            for metadata in metadatas:
+                doc_type = metadata['type']
+                type_counts[doc_type] += 1
+                if doc_type == 'entity':
+                    subject_areas[metadata['subject_area']] += 1
             
             stats = {
-                "Total Documents": len(all_data['metadatas']),
-                "Entities": len([m for m in all_data['metadatas'] if m['type'] == 'entity']),
-                "Relationships": len([m for m in all_data['metadatas'] if m['type'] == 'relationship']),
-                "Subject Areas": len([m for m in all_data['metadatas'] if m['type'] == 'subject_area'])
+                "Total Documents": len(metadatas),
+                "Entities": type_counts['entity'],
+                "Relationships": type_counts['relationship'],
+                "Subject Areas": type_counts['subject_area']
             }
             
-            # Count by subject area
-            subject_areas = {}
-            for metadata in all_data['metadatas']:
-                if metadata['type'] == 'entity':
-                    area = metadata['subject_area']
-                    if area not in subject_areas:
-                        subject_areas[area] = 0
-                    subject_areas[area] += 1
-            
             stats.update(subject_areas)
             return stats
             
@@ -677,8 +842,12 @@ if __name__ == "__main__":
     print("🚀 Starting Realistic erwin Data Load...")
     print("=" * 60)
     
-    loader = RealisticErwinLoader()
-    loader.load_data()
+    async def main():
+        loader = await RealisticErwinLoader.create(bulk_load=True)
+        await loader.load_data()
+        await loader.finalize()
+    
+    asyncio.run(main())
     
     print("\n" + "=" * 60)
     print("🎉 Realistic data loading completed!")
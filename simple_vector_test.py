@@ -14,7 +14,16 @@ print("✅ ChromaDB ready!")
 
 # Step 2: Set up embeddings
 print("🧠 Loading embedding model...")
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+try:
+    # INT8 (AVX512-VNNI) ONNX export, needs sentence-transformers[onnx] >= 3.2
+    embedding_model = SentenceTransformer(
+        'all-MiniLM-L6-v2',
+        backend='onnx',
+        model_kwargs={'file_name': 'onnx/model_qint8_avx512_vnni.onnx'}
+    )
+except Exception as e:
+    print(f"⚠️  ONNX INT8 model unavailable ({e}), using PyTorch backend")
+    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 print("✅ Embedding model ready!")
 
 # Step 3: Better erwin sample data (more detailed)
@@ -113,9 +122,10 @@ except:
     print("📝 No existing data to clear")
 
 print("\n📥 Adding detailed entities...")
+texts = []
 for entity in sample_entities:
     # Create comprehensive text description
-    text = f"""
+    texts.append(f"""
     Entity Name: {entity['name']}
     Subject Area: {entity['subject_area']}
     
@@ -126,23 +136,27 @@ for entity in sample_entities:
     
     Business Rules:
     {chr(10).join(entity['business_rules'])}
-    """
-    
-    # Create embedding
-    embedding = embedding_model.encode(text)
-    
-    # Add to ChromaDB
-    collection.add(
-        embeddings=[embedding.tolist()],
-        documents=[text],
-        metadatas={
+    """)
+
+# Create all embeddings in one batch
+embeddings = embedding_model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+
+# Add to ChromaDB
+collection.add(
+    embeddings=embeddings,
+    documents=texts,
+    metadatas=[
+        {
             "entity_name": entity['name'],
             "subject_area": entity['subject_area'],
             "attribute_count": len(entity['attributes']),
             "rule_count": len(entity['business_rules'])
-        },
-        ids=[f"entity_{entity['name'].lower()}"]
-    )
+        }
+        for entity in sample_entities
+    ],
+    ids=[f"entity_{entity['name'].lower()}" for entity in sample_entities]
+)
+for entity in sample_entities:
     print(f"✅ Added {entity['name']} entity ({entity['subject_area']})")
 
 # Step 5: Test with better queries
@@ -156,25 +170,24 @@ test_queries = [
     "pricing and cost calculations"
 ]
 
-for query in test_queries:
+# Encode and search all queries in one batch each
+query_embeddings = embedding_model.encode(test_queries, batch_size=len(test_queries), normalize_embeddings=True)
+results = collection.query(
+    query_embeddings=query_embeddings,
+    n_results=3,
+    include=["metadatas", "documents", "distances"]
+)
+
+for q, query in enumerate(test_queries):
     print(f"\n--- Searching for: '{query}' ---")
     
-    # Create query embedding
-    query_embedding = embedding_model.encode(query)
-    
-    # Search
-    results = collection.query(
-        query_embeddings=[query_embedding.tolist()],
-        n_results=3,
-        include=["metadatas", "documents", "distances"]
-    )
-    
     # Show results
-    if results['ids'] and results['ids'][0]:
-        for i in range(len(results['ids'][0])):
-            entity_name = results['metadatas'][0][i]['entity_name']
-            subject_area = results['metadatas'][0][i]['subject_area']
-            score = 1 - results['distances'][0][i]
+    if results['ids'] and results['ids'][q]:
+        for i in range(len(results['ids'][q])):
+            entity_name = results['metadatas'][q][i]['entity_name']
+            subject_area = results['metadatas'][q][i]['subject_area']
+            # Squared L2 between unit vectors is 2 - 2·cos
+            score = 1.0 - 0.5 * results['distances'][q][i]
             print(f"  📊 Found: {entity_name} ({subject_area}) - Score: {score:.3f}")
     else:
         print("  📝 No results found")
@@ -0,0 +1,81 @@
+"""
+Tests for the enhanced chatbot's async answer path
+"""
+import asyncio
+import functools
+import uuid
+
+import pytest
+
+np = pytest.importorskip("numpy")
+chromadb = pytest.importorskip("chromadb")
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+import enhanced_erwin_chat
+from erwin_embeddings import distance_to_score, score_to_distance
+
+# Unit vectors standing in for MiniLM embeddings of the records and questions
+_CUSTOMER = [1.0, 0.0, 0.0]
+_ORDERS = [0.0, 1.0, 0.0]
+_SUBJECT = [0.0, 0.0, 1.0]
+
+_QUESTION_VECTORS = {
+    "what is the customer entity?": _CUSTOMER,
+    "who buys from the shop?": _CUSTOMER,
+    "something unrelated": [-1.0, 0.0, 0.0]
+}
+
+@pytest.fixture
+def chatbot():
+    """EnhancedErwinChatbot over a small in-memory collection, without the model"""
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"test-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"})
+    collection.add(
+        ids=["entity_customer", "relationship_customer_places_orders", "subject_area_customer_management"],
+        embeddings=np.asarray([_CUSTOMER, _ORDERS, _SUBJECT], dtype=np.float32),
+        documents=[
+            "Entity: Customer\nDescription: People who buy from the shop\n",
+            "Relationship: Customer_Places_Orders\nDescription: A customer places orders\n",
+            "Subject Area: Customer Management\n"
+        ],
+        metadatas=[
+            {"type": "entity", "entity_name": "Customer", "subject_area": "Customer Management",
+             "attribute_count": 0, "rule_count": 0},
+            {"type": "relationship", "relationship_name": "Customer_Places_Orders",
+             "parent_entity": "Customer", "child_entity": "Order", "relationship_type": "One-to-Many"},
+            {"type": "subject_area", "subject_area": "Customer Management", "entity_count": 1,
+             "total_attributes": 0, "total_rules": 0}
+        ]
+    )
+    
+    bot = enhanced_erwin_chat.EnhancedErwinChatbot.__new__(enhanced_erwin_chat.EnhancedErwinChatbot)
+    bot.collection = collection
+    bot._faiss = None
+    bot._distance_to_score = functools.partial(distance_to_score, "cosine")
+    bot._score_to_distance = functools.partial(score_to_distance, "cosine")
+    bot._encode_cached = lambda question: np.asarray(_QUESTION_VECTORS[question], dtype=np.float32)
+    bot._build_name_index()
+    yield bot
+    client.delete_collection(collection.name)
+
+def test_async_answer_matches_sync_for_name_lookup(chatbot):
+    question = "What is the Customer entity?"
+    answer = asyncio.run(chatbot.answer_question_async(question))
+    
+    assert answer == chatbot.answer_question(question)
+    assert "**Customer** Entity" in answer
+    # Related relationships come from the metadata lookup, and no score is invented
+    assert "Customer_Places_Orders" in answer
+    assert "Relevance Score" not in answer
+
+def test_async_answer_falls_back_to_vector_search(chatbot):
+    answer = asyncio.run(chatbot.answer_question_async("Who buys from the shop?"))
+    
+    assert "**Customer** Entity" in answer
+    assert "Relevance Score: 1.000" in answer
+
+def test_async_answer_rejects_irrelevant_matches(chatbot):
+    answer = asyncio.run(chatbot.answer_question_async("Something unrelated"))
+    
+    assert "doesn't seem very relevant" in answer
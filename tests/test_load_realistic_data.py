@@ -0,0 +1,64 @@
+"""
+Tests for the realistic erwin data loader
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from load_realistic_data import (
+    BULK_LOAD_PRAGMAS,
+    COLLECTION_NAME,
+    DEFAULT_HNSW,
+    SAFE_PRAGMAS,
+    RealisticErwinLoader
+)
+
+def _embedded_loader(path):
+    """Loader wired to a PersistentClient at path, without loading the model"""
+    loader = RealisticErwinLoader.__new__(RealisticErwinLoader)
+    loader._chromadb = chromadb
+    loader.client = chromadb.PersistentClient(path=str(path))
+    return loader
+
+@pytest.mark.skipif(int(chromadb.__version__.split(".")[0]) >= 1,
+                    reason="chromadb >= 1.0 keeps SQLite out of Python's reach")
+def test_set_pragmas_changes_journal_mode(tmp_path):
+    loader = _embedded_loader(tmp_path)
+    conn = loader.client._server._sysdb._conn_pool.connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] != "off"
+    
+    loader._set_pragmas(BULK_LOAD_PRAGMAS)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "off"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    
+    loader._set_pragmas(SAFE_PRAGMAS)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+def test_finalize_leaves_no_bulk_hnsw_settings(tmp_path):
+    loader = RealisticErwinLoader.__new__(RealisticErwinLoader)
+    loader._chromadb = chromadb
+    loader.mode = "embedded"
+    loader.persistent = True
+    loader.path = str(tmp_path)
+    loader.bulk_load = True
+    loader._executor = ThreadPoolExecutor(max_workers=1)
+    loader._pool = None
+    
+    async def load_and_finalize():
+        await loader._connect()
+        await loader.finalize()
+    asyncio.run(load_and_finalize())
+    loader._executor.shutdown()
+    
+    collection = chromadb.PersistentClient(path=str(tmp_path)).get_collection(COLLECTION_NAME)
+    # The chatbots read the distance space back from the metadata
+    assert collection.metadata["hnsw:space"] == "cosine"
+    if int(chromadb.__version__.split(".")[0]) >= 1:
+        assert collection.configuration["hnsw"]["sync_threshold"] == DEFAULT_HNSW["sync_threshold"]
+    else:
+        assert "hnsw:batch_size" not in collection.metadata
+        assert "hnsw:sync_threshold" not in collection.metadata
@@ -1,22 +1,64 @@
 """
 Web Chat Interface for erwin RAG System
 """
+import os
+
+# Each request encodes a single short question, which is latency-bound:
+# one intra-op thread beats a contended pool (must be set before
+# erwin_embeddings imports torch)
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from erwin_embeddings import (
+    cached_encoder,
+    collection_space,
+    configure_cpu_threads,
+    distance_to_score,
+    load_query_model
+)
+configure_cpu_threads(1, 1)
+
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 import chromadb
-from sentence_transformers import SentenceTransformer
+from erwin_parsers import parse_sections
+import asyncio
+import functools
 import json
 import uvicorn
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Initialize FastAPI app
 app = FastAPI(title="erwin RAG Chat Interface", description="Conversational AI for erwin Data Models")
 
 # Set up templates (we'll create this)
 templates = Jinja2Templates(directory="templates")
 
+def _dumps(message):
+    """Serialize a WebSocket message to JSON text (orjson when installed)"""
+    if orjson is not None:
+        # Text, not bytes: the page reads event.data with JSON.parse; numpy
+        # scalars from the distance maths serialize as plain floats
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(message)
+
+def _loads(data):
+    """Parse an incoming WebSocket message"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_model():
+    """Process-wide MiniLM, single-threaded ONNX sessions for low-latency queries"""
+    return load_query_model(onnx_threads=1)
+
 class ErwinWebChatbot:
     def __init__(self):
         print("🤖 Initializing Web Chatbot...")
@@ -24,21 +66,26 @@ class ErwinWebChatbot:
         # Set up ChromaDB with enterprise data
         self.client = chromadb.PersistentClient(path="./enterprise_chroma_db")
         self.collection = self.client.get_collection("enterprise-erwin-model")
+        self._distance_to_score = functools.partial(distance_to_score, collection_space(self.collection))
         
         # Set up embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = get_embedding_model()
+        
+        # Per-instance LRU of query embeddings, keyed on the normalized question
+        self._encode_cached = cached_encoder(self.embedding_model, maxsize=1024)
         
         print("✅ Web Chatbot ready!")
     
     def search_and_respond(self, question):
         """Search and generate response for web interface"""
         try:
-            # Create query embedding
-            query_embedding = self.embedding_model.encode(question)
+            # Create query embedding - explicitly rather than via query_texts, so the
+            # LRU cache and INT8 encoder stay on the hot path (see _connect in the loader)
+            query_embedding = self._encode_cached(question.strip().lower())
             
             # Search ChromaDB
             results = self.collection.query(
-                query_embeddings=[query_embedding.tolist()],
+                query_embeddings=query_embedding.reshape(1, -1),
                 n_results=3,
                 include=["metadatas", "documents", "distances"]
             )
@@ -52,8 +99,20 @@ class ErwinWebChatbot:
                 }
             
             # Get best match
-            best_score = 1 - results['distances'][0][0]
-            best_metadata = results['metadatas'][0][0]
+            metas = results['metadatas'][0]
+            dists = results['distances'][0]
+            best_score = self._distance_to_score(dists[0])
+            
+            # Off-topic question: skip the formatters, nothing to show
+            if best_score < 0.25:
+                return {
+                    "success": False,
+                    "response": "❓ I don't have information on that in the data model. Could you rephrase your question?",
+                    "sources": [],
+                    "confidence": best_score
+                }
+            
+            best_metadata = metas[0]
             best_content = results['documents'][0][0]
             
             # Generate response
@@ -62,13 +121,12 @@ class ErwinWebChatbot:
             # Collect sources
             sources = []
             for i in range(min(3, len(results['ids'][0]))):
+                m = metas[i]
                 sources.append({
-                    "name": results['metadatas'][0][i].get('entity_name', 
-                                 results['metadatas'][0][i].get('relationship_name',
-                                 results['metadatas'][0][i].get('subject_area', 'Unknown'))),
-                    "type": results['metadatas'][0][i]['type'],
-                    "score": 1 - results['distances'][0][i],
-                    "subject_area": results['metadatas'][0][i].get('subject_area', 'N/A')
+                    "name": m.get('entity_name') or m.get('relationship_name') or m.get('subject_area') or 'Unknown',
+                    "type": m['type'],
+                    "score": self._distance_to_score(dists[i]),
+                    "subject_area": m.get('subject_area', 'N/A')
                 })
             
             return {
@@ -107,22 +165,20 @@ class ErwinWebChatbot:
         attr_count = metadata.get('attribute_count', 0)
         rule_count = metadata.get('rule_count', 0)
         
+        # The loader stores these pre-parsed; older collections only have the document
+        description = metadata.get('description')
+        attributes = json.loads(metadata['sample_attributes']) if 'sample_attributes' in metadata else None
+        if description is None or attributes is None:
+            sections = parse_sections(content)
+            if description is None:
+                description = " ".join(sections['description'])
+            if attributes is None:
+                attributes = sections['attributes'][:3]
+        
         response = f"**{entity_name}** is an entity in the {subject_area} subject area.\n\n"
         
-        # Extract description
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            if "Description:" in line and i + 1 < len(lines):
-                desc_start = i + 1
-                desc_lines = []
-                for j in range(desc_start, len(lines)):
-                    if lines[j].strip() and not lines[j].startswith("Attributes:"):
-                        desc_lines.append(lines[j].strip())
-                    else:
-                        break
-                if desc_lines:
-                    response += " ".join(desc_lines) + "\n\n"
-                break
+        if description:
+            response += description + "\n\n"
         
         response += f"📊 **Key Details:**\n"
         response += f"• Contains {attr_count} attributes\n"
@@ -130,19 +186,6 @@ class ErwinWebChatbot:
         response += f"• Part of {subject_area}\n\n"
         
         # Add a few key attributes
-        in_attributes = False
-        attributes = []
-        for line in lines:
-            if "Attributes" in line and ":" in line:
-                in_attributes = True
-                continue
-            elif "Business Rules" in line:
-                break
-            elif in_attributes and line.strip().startswith('•'):
-                attributes.append(line.strip()[2:])
-                if len(attributes) >= 3:
-                    break
-        
         if attributes:
             response += "🔧 **Sample Attributes:**\n"
             for attr in attributes:
@@ -160,14 +203,12 @@ class ErwinWebChatbot:
         response = f"**{rel_name}** is a {rel_type} relationship.\n\n"
         response += f"🔗 **Connection:** {parent} → {child}\n\n"
         
-        # Extract description
-        lines = content.split('\n')
-        for line in lines:
-            if "Description:" in line:
-                idx = lines.index(line)
-                if idx + 1 < len(lines):
-                    response += lines[idx + 1].strip()
-                break
+        description = metadata.get('description')
+        if description is None:
+            # Only the inline text after "Description:" describes the relationship
+            lines = parse_sections(content)['description']
+            description = lines[0] if lines else ""
+        response += description
         
         return response
     
@@ -178,19 +219,10 @@ class ErwinWebChatbot:
         
         response = f"**{subject_area}** is a subject area containing {entity_count} entities.\n\n"
         
-        # Extract entities
-        lines = content.split('\n')
-        in_entities = False
-        entities = []
-        
-        for line in lines:
-            if "Entities in this Subject Area:" in line:
-                in_entities = True
-                continue
-            elif in_entities and line.strip().startswith('•'):
-                entities.append(line.strip()[2:])
-            elif in_entities and line.strip() and not line.strip().startswith('•'):
-                break
+        if 'entity_list' in metadata:
+            entities = json.loads(metadata['entity_list'])
+        else:
+            entities = parse_sections(content)['entities']
         
         if entities:
             response += "📋 **Contains these entities:**\n"
@@ -220,21 +252,22 @@ async def websocket_endpoint(websocket: WebSocket):
         "timestamp": datetime.now().strftime("%H:%M:%S"),
         "sources": []
     }
-    await websocket.send_text(json.dumps(welcome_message))
+    await websocket.send_text(_dumps(welcome_message))
     
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = _loads(data)
             
             user_message = message_data.get("message", "").strip()
             
             if not user_message:
                 continue
             
-            # Process the question
-            response = chatbot.search_and_respond(user_message)
+            # Process the question on a worker thread: encoding and the Chroma
+            # query are blocking, and the loop has other sockets to serve
+            response = await asyncio.to_thread(chatbot.search_and_respond, user_message)
             
             # Send response back to client
             response_message = {
@@ -246,7 +279,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 "success": response["success"]
             }
             
-            await websocket.send_text(json.dumps(response_message))
+            await websocket.send_text(_dumps(response_message))
             
     except WebSocketDisconnect:
         print("Client disconnected")